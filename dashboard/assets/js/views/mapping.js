@@ -152,17 +152,25 @@ async function loadParcelLayer() {
       spiderfyOnMaxZoom: true
     });
     
-    // Try to load individual parcels first
+    // Try to load individual parcels first. The Python scripts write GeoJSON text
+    // sequences (.geojsons); fall back to the older FeatureCollection files.
     const parcelFiles = [
-      'geojson/parcels/individual_parcels.normalized.source_commune.geojson',
-      'geojson/parcels/collective_parcels.normalized.source_commune.geojson'
+      ['geojson/parcels/individual_parcels.normalized.source_commune.geojsons',
+       'geojson/parcels/individual_parcels.normalized.source_commune.geojson'],
+      ['geojson/parcels/collective_parcels.normalized.source_commune.geojsons',
+       'geojson/parcels/collective_parcels.normalized.source_commune.geojson']
     ];
     
     let totalParcels = 0;
     
-    for (const filePath of parcelFiles) {
+    for (const candidates of parcelFiles) {
+      let filePath = candidates[0];
       try {
-        const response = await fetch(filePath);
+        let response = null;
+        for (filePath of candidates) {
+          response = await fetch(filePath);
+          if (response.ok) break;
+        }
         // detect Git LFS pointer files (they start with 'version https://git-lfs.github.com/spec/v1')
         const text = await response.text();
         if (text && text.startsWith('version https://git-lfs.github.com/spec/v1')) {
@@ -171,7 +179,7 @@ async function loadParcelLayer() {
           // Skip this file
           continue;
         }
-        const geojsonData = JSON.parse(text);
+        const geojsonData = parseGeoJSON(text);
         
         // Create a layer but don't add directly to map - add to cluster
         parcelLayer = L.geoJSON(geojsonData, {
@@ -229,6 +237,20 @@ async function loadParcelLayer() {
   }
 }
 
+/**
+ * Parse a GeoJSON document or a GeoJSON text sequence (RFC 8142)
+ * @param {string} text - File content
+ * @returns {Object} FeatureCollection
+ */
+function parseGeoJSON(text) {
+  if (text.charCodeAt(0) !== 0x1e) return JSON.parse(text);
+  const features = [];
+  for (const record of text.split('\x1e')) {
+    if (record.trim()) features.push(JSON.parse(record));
+  }
+  return { type: 'FeatureCollection', features };
+}
+
 /**
  * Handle parcel click
  * @param {Object} feature - GeoJSON feature
@@ -0,0 +1,262 @@
+"""
+Shared GeoJSON streaming helpers for the commune scripts.
+- Reads GeoJSON FeatureCollections incrementally with ijson (the document is never fully loaded)
+- Reads and writes GeoJSON text sequences (RFC 8142, `.geojsons` files): one RS-prefixed feature
+  per record, the FeatureCollection members (type, name, crs) live in a sibling `.header.json`
+- Integers outside the 64-bit range: the ijson C backend rejects them, such FeatureCollections are
+  re-read with the pure-Python backend; orjson cannot encode them, such records are written with json.
+  orjson decodes them as floats, so text sequence properties are decoded with json (split_properties)
+
+Usage (from another script in this folder):
+    from _geojson_stream import iter_features
+"""
+import codecs
+import itertools
+import json
+import mmap
+import os
+import re
+
+import ijson
+import orjson
+
+# GeoJSON text sequence (RFC 8142) record separator
+RS = b'\x1e'
+# large write buffer so per-feature writes are not one syscall each
+WRITE_BUFFER = 8 << 20
+
+# pure-Python ijson backend, slower but handles integers of any size
+_IJSON_PY = ijson.get_backend('python')
+
+_PROPERTIES_RE = re.compile(rb'"properties"\s*:\s*')
+_DECODER = json.JSONDecoder()
+# first slice decoded after "properties": (doubled until the object fits)
+PROPERTIES_PROBE = 4096
+# end of a FeatureCollection read for members after the features array (doubled until found)
+TAIL_PROBE = 64 << 10
+# a ']' closing an array of objects (or an empty one) followed by ',' or the closing '}'
+_ARRAY_END_RE = re.compile(rb'[}\[]\s*\](\s*[,}])')
+
+
+def header_path(fp):
+    """Sibling file holding the FeatureCollection members of a GeoJSON text sequence."""
+    return os.path.splitext(fp)[0] + '.header.json'
+
+
+def is_geojson_seq(fp):
+    with open(fp, 'rb') as f:
+        return f.read(1) == RS
+
+
+def _read_trailing_members(fp):
+    """Return the top-level members written after the features array (bbox...) of a FeatureCollection.
+    Only the end of the file is read: the array end is the first ']' of the tail after which the
+    rest of the document decodes as the remainder of an object. Those members (bbox, crs...) are
+    expected to fit in the last TAIL_PROBE bytes.
+    """
+    with open(fp, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        probe = TAIL_PROBE
+        while True:
+            start = max(0, size - probe)
+            f.seek(start)
+            tail = f.read()
+            for m in _ARRAY_END_RE.finditer(tail):
+                rest = tail[m.end(1):] if m.group(1).endswith(b',') else tail[m.end(1) - 1:]
+                try:
+                    members = json.loads(b'{' + rest)
+                except ValueError:
+                    continue
+                # a ']' before the array leaves "features" in what follows it
+                if 'features' not in members:
+                    return members
+            if start == 0:
+                return {}
+            probe *= 2
+
+
+def _is_int_overflow(e):
+    return 'integer overflow' in str(e)
+
+
+def _read_leading_members(fp, parse):
+    header = {}
+    key = None
+    builder = None
+    with open(fp, 'rb') as f:
+        for prefix, event, value in parse(f, use_float=True):
+            if prefix == '':
+                if builder is not None:
+                    header[key] = builder.value
+                    builder = None
+                if event == 'map_key':
+                    if value == 'features':
+                        break
+                    key = value
+                    builder = ijson.ObjectBuilder()
+                continue
+            builder.event(event, value)
+        else:
+            raise ValueError('No features array found')
+    return header
+
+
+def read_geojson_header(fp):
+    """Return the top-level FeatureCollection members other than features (type, name, crs, bbox...).
+    Events are consumed only until the "features" key is reached; members written after the array
+    are recovered from the end of the file.
+    """
+    if is_geojson_seq(fp):
+        hp = header_path(fp)
+        if not os.path.exists(hp):
+            return {}
+        with open(hp, 'rb') as hf:
+            return json.loads(hf.read())
+    try:
+        header = _read_leading_members(fp, ijson.parse)
+    except ijson.IncompleteJSONError as e:
+        if not _is_int_overflow(e):
+            raise
+        header = _read_leading_members(fp, _IJSON_PY.parse)
+    header.update(_read_trailing_members(fp))
+    return header
+
+
+def write_geojson_header(fp, header):
+    with open(header_path(fp), 'wb') as hf:
+        hf.write(dumps(header))
+
+
+def dumps(obj, newline=False):
+    """Encode obj to compact JSON bytes with orjson, or json for integers orjson cannot encode."""
+    try:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE if newline else 0)
+    except TypeError:
+        data = json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        return data + b'\n' if newline else data
+
+
+def _iter_items(fp, prefix):
+    """ijson.items over a FeatureCollection. On an integer overflow of the C backend the file is
+    re-read with the pure-Python backend, skipping the items already yielded.
+    """
+    done = 0
+    try:
+        with open(fp, 'rb') as f:
+            for item in ijson.items(f, prefix, use_float=True):
+                yield item
+                done += 1
+        return
+    except ijson.IncompleteJSONError as e:
+        if not _is_int_overflow(e):
+            raise
+    with open(fp, 'rb') as f:
+        yield from itertools.islice(_IJSON_PY.items(f, prefix, use_float=True), done, None)
+
+
+def iter_records_ndjson(fp):
+    """Yield the raw bytes of each record of a GeoJSON text sequence (RFC 8142).
+    Records are delimited by RS only (not by newlines) so multi-line records from other
+    producers are read correctly. The file is memory-mapped: the kernel pages it in on
+    demand instead of the whole content being copied into the process.
+    """
+    with open(fp, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # mmap.find is a memchr-based scan done in C, pages are faulted in lazily
+            start = mm.find(RS)
+            while start != -1:
+                end = mm.find(RS, start + 1)
+                rec = mm[start + 1:end] if end != -1 else mm[start + 1:]
+                if rec and not rec.isspace():
+                    yield rec
+                start = end
+
+
+def iter_features_ndjson(fp):
+    """Yield feature dicts from a GeoJSON text sequence (RFC 8142).
+    Records are decoded with orjson: integers outside the 64-bit range come back as floats.
+    """
+    for rec in iter_records_ndjson(fp):
+        yield orjson.loads(rec)
+
+
+def iter_feature_records(fp, parse=True):
+    """Yield (raw_bytes, feature_dict) one by one, for either input format.
+    raw_bytes is the source record for text sequence inputs, None for FeatureCollections.
+    With parse=False text sequence records are not decoded and feature_dict is None, otherwise
+    they are decoded with orjson (see iter_features_ndjson).
+    """
+    if is_geojson_seq(fp):
+        for rec in iter_records_ndjson(fp):
+            yield rec, (orjson.loads(rec) if parse else None)
+        return
+    for feat in _iter_items(fp, 'features.item'):
+        yield None, feat
+
+
+def iter_features(fp):
+    """Yield feature dicts one by one from a FeatureCollection or a GeoJSON text sequence."""
+    if is_geojson_seq(fp):
+        yield from iter_features_ndjson(fp)
+        return
+    yield from _iter_items(fp, 'features.item')
+
+
+def iter_properties(fp):
+    """Yield only the properties of each feature; FeatureCollection geometries are never built."""
+    if is_geojson_seq(fp):
+        for rec in iter_records_ndjson(fp):
+            span = split_properties(rec)
+            yield span[0] if span is not None else json.loads(rec).get('properties')
+        return
+    yield from _iter_items(fp, 'features.item.properties')
+
+
+def split_properties(raw):
+    """Decode only the top-level "properties" member of a raw feature record.
+    Returns (props, start, end) where raw[start:end] is the encoded properties object, so the
+    record can be rewritten with only that slice replaced and the geometry is never parsed.
+    Returns None when the member cannot be located safely; the caller then parses the record.
+    """
+    m = _PROPERTIES_RE.search(raw)
+    # a single '{' before the key means it belongs to the feature object itself
+    if not m or raw.count(b'{', 0, m.start()) != 1:
+        return None
+    start = m.end()
+    size = PROPERTIES_PROBE
+    while True:
+        # only a bounded slice is decoded; the incremental decoder holds back a
+        # multi-byte character cut at the slice end instead of failing on it
+        final = start + size >= len(raw)
+        try:
+            text = codecs.getincrementaldecoder('utf-8')().decode(raw[start:start + size], final)
+            props, end = _DECODER.raw_decode(text)
+            break
+        except ValueError:
+            # the object may just be truncated by the slice: retry with a larger one
+            if final:
+                return None
+            size *= 2
+    if not isinstance(props, dict):
+        return None
+    text = text[:end]
+    return props, start, start + (end if text.isascii() else len(text.encode('utf-8')))
+
+
+def replace_properties(raw, start, end, props):
+    return raw[:start] + dumps(props) + raw[end:]
+
+
+def write_feature(out_f, feat, raw=None):
+    """Append one record to a GeoJSON text sequence opened in binary mode.
+    When raw (the untouched source record) is given it is copied instead of re-encoding feat.
+    """
+    out_f.write(RS)
+    if raw is not None:
+        out_f.write(raw)
+        if not raw.endswith(b'\n'):
+            out_f.write(b'\n')
+    else:
+        out_f.write(dumps(feat, newline=True))
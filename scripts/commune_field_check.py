@@ -1,5 +1,8 @@
 import json
-from collections import Counter
+
+import numpy as np
+
+from _geojson_stream import iter_properties
 
 COMMUNES_JSON = r"c:\Users\USER\Documents\Applications\NewEDL\data\communes_data.json"
 COMMUNES_GEOJSON = r"c:\Users\USER\Documents\Applications\NewEDL\geojson\communes\communes.geojson"
@@ -9,31 +12,37 @@ with open(COMMUNES_JSON, 'r', encoding='utf-8') as f:
     names = [c.get('name') for c in data.get('communes', []) if c.get('name')]
     set_names = set(names)
 
-with open(COMMUNES_GEOJSON, 'r', encoding='utf-8') as f:
-    gj = json.load(f)
-
 candidates = ['CAV', 'CCRCA', 'CCRCA_1', 'SUSCOL', 'REG', 'DEPT', 'CodeJoin']
-values = {k: Counter() for k in candidates}
+columns = {k: [] for k in candidates}
 
-for feat in gj.get('features', []):
-    props = feat.get('properties', {})
+# stream properties only, the geojson is never fully loaded in memory
+for props in iter_properties(COMMUNES_GEOJSON):
+    props = props or {}
     for k in candidates:
         v = props.get(k)
         if v is None:
             continue
-        # normalize
-        if isinstance(v, (int, float)):
-            v = str(v)
-        v = v.strip() if isinstance(v, str) else str(v)
-        values[k][v] += 1
+        # scalars are stringified by numpy below, nested values (lists, dicts) here
+        columns[k].append(v if isinstance(v, (str, int, float)) else str(v))
+
+# normalize (stringify + strip) and count each column in one vectorized pass;
+# first occurrences keep values in the order they are seen in the file
+names_arr = np.array(sorted(set_names), dtype=str)
+values = {}
+matches = {}
+for k, col in columns.items():
+    distinct, first, counts = np.unique(np.char.strip(np.asarray(col, dtype=str)),
+                                        return_index=True, return_counts=True)
+    values[k] = (distinct, first, counts)
+    hit = np.flatnonzero(np.isin(distinct, names_arr))
+    matches[k] = distinct[hit[np.argsort(first[hit])]]
 
 # compute overlaps
 print('Total communes.json names:', len(set_names))
 print('Sample names from communes.json:', list(names)[:10])
 print('\nCandidate field statistics and overlap with communes.json:')
-for k, counter in values.items():
-    distinct = set(counter.keys())
-    intersection = distinct & set_names
+for k, (distinct, first, counts) in values.items():
+    intersection = matches[k]
     match_count = len(intersection)
     total_distinct = len(distinct)
     pct = (match_count / len(set_names) * 100) if set_names else 0
@@ -41,17 +50,21 @@ for k, counter in values.items():
     print(f"  Distinct values: {total_distinct}")
     print(f"  Matches with communes.json: {match_count} ({pct:.1f}% of communes.json names)")
     if match_count:
-        print(f"  Matched examples: {list(intersection)[:10]}")
+        print(f"  Matched examples: {intersection[:10].tolist()}")
     else:
-        # show top values
-        print(f"  Top values: {counter.most_common(5)}")
+        # show top values: keep the values reaching the 5th highest count (partial partition),
+        # then sort those by count, ties broken by first occurrence
+        top = np.arange(len(counts))
+        if len(counts) > 5:
+            top = np.flatnonzero(counts >= np.partition(counts, len(counts) - 5)[len(counts) - 5])
+        top = top[np.lexsort((first[top], -counts[top]))][:5]
+        print(f"  Top values: {list(zip(distinct[top].tolist(), counts[top].tolist()))}")
 
 # recommend best field
 best = None
 best_pct = -1
-for k, counter in values.items():
-    distinct = set(counter.keys())
-    match_count = len(distinct & set_names)
+for k in values:
+    match_count = len(matches[k])
     pct = (match_count / len(set_names) * 100) if set_names else 0
     if pct > best_pct:
         best_pct = pct
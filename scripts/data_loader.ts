@@ -9,8 +9,11 @@ const PARCELS_DIR = path.join(ROOT, 'geojson', 'parcels')
 const OUT_DIR = path.join(ROOT, 'data', 'lookups')
 
 const preferPatterns = [
+  '*.source_commune.geojsons',
   '*.source_commune.geojson',
+  '*.normalized.source_commune.geojsons',
   '*.normalized.source_commune.geojson',
+  '*.normalized.geojsons',
   '*.normalized.geojson',
   '*.geojson'
 ]
@@ -27,6 +30,14 @@ function findParcelFiles(): string[] {
   return found
 }
 
+// Python scripts write GeoJSON text sequences (RFC 8142): one RS-prefixed feature per record
+function parseGeoJSON(raw: string): any {
+  if (raw.charCodeAt(0) !== 0x1e) return JSON.parse(raw)
+  const features: any[] = []
+  for (const rec of raw.split('\x1e')) if (rec.trim()) features.push(JSON.parse(rec))
+  return { type: 'FeatureCollection', features }
+}
+
 function normalizeName(v: any): string | null {
   if (!v) return null
   return String(v).trim().toUpperCase()
@@ -52,7 +63,7 @@ function main() {
     console.log('Reading', f)
     const raw = fs.readFileSync(f, 'utf8')
     let gj: any
-    try { gj = JSON.parse(raw) } catch(e) { console.error('Invalid JSON', f); continue }
+    try { gj = parseGeoJSON(raw) } catch(e) { console.error('Invalid JSON', f); continue }
     const features = gj.features || []
     for (const feat of features) {
       const props = feat.properties || {}
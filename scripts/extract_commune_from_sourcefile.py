@@ -1,22 +1,49 @@
 """
 Extract commune names from 'source_file' property for parcel GeoJSON files.
-- Looks for files in geojson/parcels/*.normalized.geojson or falls back to geojson/parcels/*.geojson
+- Looks for files in geojson/parcels/*.normalized.geojsons (or older *.normalized.geojson) and falls back to geojson/parcels/*.geojson
 - For each feature: if 'commune' is missing or null and 'source_file' is present, extract substring before first '_' and normalize it
-- Writes output with suffix `.source_commune.geojson`
+- Long commune lists are matched with an Aho-Corasick automaton when pyahocorasick is installed,
+  otherwise (and for short lists) with a substring loop over the names, longest first
+- Parcel files are processed in parallel, one worker process per CPU
+- Writes output with suffix `.source_commune.geojsons` as a GeoJSON text sequence (RFC 8142),
+  collection members (type, name, crs) go to `.source_commune.header.json`
 - Produces report at data/commune_extraction_report.json
+- Features are streamed and written through scripts/_geojson_stream.py (ijson + orjson)
 
 Usage:
     python scripts/extract_commune_from_sourcefile.py
 """
 import os
 import json
+import pickle
 import re
 import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from glob import glob
 
+try:
+    import ahocorasick
+except ImportError:  # optional, the substring loop is used instead
+    ahocorasick = None
+
+from _geojson_stream import (
+    WRITE_BUFFER, iter_feature_records, read_geojson_header, replace_properties, split_properties,
+    write_feature, write_geojson_header,
+)
+
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 PARCELS_DIR = os.path.join(ROOT, 'geojson', 'parcels')
 REPORT_PATH = os.path.join(ROOT, 'data', 'commune_extraction_report.json')
+COMMUNES_PATH = os.path.join(ROOT, 'data', 'communes_data.json')
+COMMUNES_CACHE_PATH = os.path.join(ROOT, 'data', '.communes_norm.pkl')
+
+
+_WS_RE = re.compile(r"\s+")
+# '_' and '-' separate words in source_file names, like whitespace
+_SEPARATORS = str.maketrans('_-', '  ')
+# Below this many names a substring loop beats the fixed cost of an Aho-Corasick walk
+AUTOMATON_MIN_COMMUNES = 64
 
 
 def normalize_name(v):
@@ -24,153 +51,154 @@ def normalize_name(v):
         return None
     if not isinstance(v, str):
         v = str(v)
+    return _normalize_str(v)
+
+
+@lru_cache(maxsize=200_000)
+def _normalize_str(v):
     v = v.strip()
     if not v:
         return None
-    v = unicodedata.normalize('NFD', v)
-    v = ''.join(ch for ch in v if unicodedata.category(ch) != 'Mn')
-    v = re.sub(r"\s+", ' ', v)
+    # ASCII strings have no combining marks, skip the NFD pass
+    if not v.isascii():
+        v = unicodedata.normalize('NFD', v)
+        v = ''.join(ch for ch in v if unicodedata.category(ch) != 'Mn')
+    v = _WS_RE.sub(' ', v)
     v = v.upper()
     return v
 
 
+_KNOWN_COMMUNES = None
+_COMMUNES_LONGEST_FIRST = ()
+_COMMUNE_AUTOMATON = None
+_COMMUNE_BY_TOKEN = {}
+
+
+def load_known_communes():
+    """Return the normalized names from data/communes_data.json.
+    The set is pickled to data/.communes_norm.pkl together with the source mtime and size,
+    so later runs (and every worker process) skip the JSON parsing and normalization.
+    """
+    try:
+        st = os.stat(COMMUNES_PATH)
+    except OSError:
+        return set()
+    key = (st.st_mtime_ns, st.st_size)
+    try:
+        with open(COMMUNES_CACHE_PATH, 'rb') as cf:
+            cached_key, known = pickle.load(cf)
+        if cached_key == key:
+            return known
+    except Exception:
+        pass
+
+    known = set()
+    try:
+        with open(COMMUNES_PATH, 'r', encoding='utf-8') as cf:
+            jd = json.load(cf)
+            for c in jd.get('communes', []):
+                n = c.get('name')
+                if not n:
+                    continue
+                # normalize known names, also replace underscores/dashes with spaces
+                n_space = n.replace('_', ' ').replace('-', ' ')
+                known.add(normalize_name(n_space))
+                known.add(normalize_name(n))
+    except Exception:
+        return set()
+    known.discard(None)
+
+    # workers may rebuild concurrently: write to a private file then swap it in atomically
+    tmp_path = '%s.%d' % (COMMUNES_CACHE_PATH, os.getpid())
+    try:
+        with open(tmp_path, 'wb') as cf:
+            pickle.dump((key, known), cf, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, COMMUNES_CACHE_PATH)
+    except OSError:
+        pass
+    return known
+
+
+def _init_communes():
+    """Load known communes once and compile the matcher."""
+    global _KNOWN_COMMUNES, _COMMUNES_LONGEST_FIRST, _COMMUNE_AUTOMATON, _COMMUNE_BY_TOKEN
+    known = load_known_communes()
+    _KNOWN_COMMUNES = known
+    _COMMUNES_LONGEST_FIRST = tuple(sorted(known, key=len, reverse=True))
+    # first word -> (name, name + ' ') for every commune starting with it, longest first
+    by_token = {}
+    for c in _COMMUNES_LONGEST_FIRST:
+        by_token.setdefault(c.split(' ', 1)[0], []).append((c, c + ' '))
+    _COMMUNE_BY_TOKEN = by_token
+    # long lists: one Aho-Corasick pass over the candidate reports every commune it contains;
+    # each name carries its longest-first rank so both matchers pick the same one
+    _COMMUNE_AUTOMATON = None
+    if ahocorasick is not None and len(known) >= AUTOMATON_MIN_COMMUNES:
+        automaton = ahocorasick.Automaton()
+        for rank, c in enumerate(_COMMUNES_LONGEST_FIRST):
+            automaton.add_word(c, (rank, c))
+        automaton.make_automaton()
+        _COMMUNE_AUTOMATON = automaton
+
+
 def extract_from_source_file(sf):
     if not sf or not isinstance(sf, str):
         return None
     # often values like 'TOMBORONKOTO_LINESTRINGZ' or 'SINTHIOU_MALEME_LINESTRINGZ'
     # Strategy: try to match known commune names from the project's communes list
     s = os.path.splitext(os.path.basename(sf))[0]
-    candidate = s.replace('_', ' ').replace('-', ' ').strip()
+    spaced = s.translate(_SEPARATORS)
+    candidate = spaced.strip()
     candidate_norm = normalize_name(candidate)
 
-    # load known communes (from data/communes_data.json) once
-    global _KNOWN_COMMUNES
-    if '_KNOWN_COMMUNES' not in globals():
-        _KNOWN_COMMUNES = set()
-        try:
-            comm_file = os.path.join(ROOT, 'data', 'communes_data.json')
-            with open(comm_file, 'r', encoding='utf-8') as cf:
-                jd = json.load(cf)
-                for c in jd.get('communes', []):
-                    n = c.get('name')
-                    if not n:
-                        continue
-                    # normalize known names, also replace underscores/dashes with spaces
-                    n_space = n.replace('_', ' ').replace('-', ' ')
-                    _KNOWN_COMMUNES.add(normalize_name(n_space))
-                    _KNOWN_COMMUNES.add(normalize_name(n))
-        except Exception:
-            _KNOWN_COMMUNES = set()
+    if _KNOWN_COMMUNES is None:
+        _init_communes()
+
+    # fast path: the commune is nearly always the leading word(s) of the file name
+    if candidate_norm:
+        head = candidate_norm + ' '
+        for comm, prefix in _COMMUNE_BY_TOKEN.get(candidate_norm.split(' ', 1)[0], ()):
+            if head.startswith(prefix):
+                return comm
 
     # find best (longest) commune name that appears in candidate_norm
     best = None
-    if _KNOWN_COMMUNES:
-        for comm in _KNOWN_COMMUNES:
-            if comm in candidate_norm:
-                if best is None or len(comm) > len(best):
+    if candidate_norm:
+        if _COMMUNE_AUTOMATON is not None:
+            best = min((v for _, v in _COMMUNE_AUTOMATON.iter(candidate_norm)), default=(None, None))[1]
+        else:
+            # longest names first: the first one found is the best
+            for comm in _COMMUNES_LONGEST_FIRST:
+                if comm in candidate_norm:
                     best = comm
+                    break
     if best:
         return best
 
     # fallback: take first token if no known commune matched
-    token = re.split(r'[_\-\s]+', s)[0]
-    token = token.strip()
-    if not token:
+    tokens = spaced.split(None, 1)
+    if not tokens:
         return None
-    return normalize_name(token)
-
-
-def stream_features_from_geojson(fp):
-    with open(fp, 'r', encoding='utf-8', errors='ignore') as f:
-        data = f.read()
-    m = re.search(r'"features"\s*:\s*\[', data)
-    if not m:
-        raise ValueError('No features array')
-    array_start = m.end()
-    i = array_start
-    depth = 1
-    in_str = False
-    esc = False
-    while i < len(data):
-        ch = data[i]
-        if in_str:
-            if esc:
-                esc = False
-            elif ch == '\\':
-                esc = True
-            elif ch == '"':
-                in_str = False
-        else:
-            if ch == '"':
-                in_str = True
-            elif ch == '[':
-                depth += 1
-            elif ch == ']':
-                depth -= 1
-                if depth == 0:
-                    array_end = i
-                    break
-        i += 1
-    pre = data[:array_start]
-    features_block = data[array_start:array_end]
-    post = data[array_end:]
-    n = len(features_block)
-    i = 0
-    while i < n:
-        while i < n and features_block[i].isspace():
-            i += 1
-        if i < n and features_block[i] == ',':
-            i += 1
-            continue
-        if i >= n:
-            break
-        if features_block[i] != '{':
-            i += 1
-            continue
-        depth = 0
-        start_idx = i
-        in_str = False
-        esc = False
-        while i < n:
-            ch = features_block[i]
-            if in_str:
-                if esc:
-                    esc = False
-                elif ch == '\\':
-                    esc = True
-                elif ch == '"':
-                    in_str = False
-            else:
-                if ch == '"':
-                    in_str = True
-                elif ch == '{':
-                    depth += 1
-                elif ch == '}':
-                    depth -= 1
-                    if depth == 0:
-                        i += 1
-                        break
-            i += 1
-        feat_text = features_block[start_idx:i]
-        yield pre, feat_text, post
-        pre = ''
-
-
-def process_file(in_path, out_path, report):
-    pre_written = False
-    first = True
+    return normalize_name(tokens[0])
+
+
+def process_file(in_path, out_path):
     total = 0
     updated = 0
     samples = []
-    gen = stream_features_from_geojson(in_path)
-    with open(out_path, 'w', encoding='utf-8') as out_f:
-        for pre, feat_text, post in gen:
-            if not pre_written:
-                out_f.write(pre)
-                pre_written = True
-            feat = json.loads(feat_text)
-            props = feat.get('properties', {}) or {}
+    write_geojson_header(out_path, read_geojson_header(in_path))
+    with open(out_path, 'wb', buffering=WRITE_BUFFER) as out_f:
+        for raw, feat in iter_feature_records(in_path, parse=False):
+            # text sequence records: decode the properties only, the geometry stays raw bytes
+            span = split_properties(raw) if feat is None else None
+            if span is not None:
+                props, start, end = span
+            else:
+                if feat is None:
+                    feat = json.loads(raw)
+                props = feat.get('properties', {}) or {}
             commune = props.get('commune')
+            extracted = None
             if not commune and 'source_file' in props:
                 sf = props.get('source_file')
                 extracted = extract_from_source_file(sf)
@@ -179,38 +207,46 @@ def process_file(in_path, out_path, report):
                     updated += 1
                     if len(samples) < 5:
                         samples.append({'source_file': sf, 'commune': extracted})
-            feat['properties'] = props
-            if first:
-                out_f.write('\n')
-                out_f.write(json.dumps(feat, ensure_ascii=False))
-                first = False
+            if raw is not None and not extracted:
+                # feature left untouched: copy the source record instead of re-encoding it
+                write_feature(out_f, None, raw)
+            elif span is not None:
+                write_feature(out_f, None, replace_properties(raw, start, end, props))
             else:
-                out_f.write(',\n')
-                out_f.write(json.dumps(feat, ensure_ascii=False))
+                feat['properties'] = props
+                write_feature(out_f, feat)
             total += 1
-        out_f.write('\n')
-        out_f.write(']')
-        if post:
-            out_f.write(post[1:])
-    report['files'].append({'input': in_path, 'output': out_path, 'total_features': total, 'updated': updated, 'samples': samples})
+    return {'input': in_path, 'output': out_path, 'total_features': total, 'updated': updated, 'samples': samples}
 
 
 def main():
     report = {'files': []}
-    patterns = [os.path.join(PARCELS_DIR, '*.normalized.geojson'), os.path.join(PARCELS_DIR, '*.geojson')]
+    patterns = [
+        os.path.join(PARCELS_DIR, '*.normalized.geojsons'),
+        os.path.join(PARCELS_DIR, '*.normalized.geojson'),
+        os.path.join(PARCELS_DIR, '*.geojson'),
+    ]
     seen = set()
+    jobs = []
     for pat in patterns:
         for f in glob(pat):
             if f in seen:
                 continue
             seen.add(f)
-            if f.endswith('.source_commune.geojson'):
+            if f.endswith(('.source_commune.geojson', '.source_commune.geojsons')):
                 continue
             base = os.path.splitext(f)[0]
-            out = base + '.source_commune.geojson'
+            jobs.append((f, base + '.source_commune.geojsons'))
+    # parcel files are independent: one worker per CPU, communes loaded once per worker
+    workers = max(1, min(len(jobs), os.cpu_count() or 1))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_communes) as pool:
+        futures = []
+        for f, out in jobs:
             print('Processing', os.path.relpath(f, ROOT), '->', os.path.relpath(out, ROOT))
+            futures.append((f, pool.submit(process_file, f, out)))
+        for f, fut in futures:
             try:
-                process_file(f, out, report)
+                report['files'].append(fut.result())
             except Exception as e:
                 report['files'].append({'input': f, 'error': str(e)})
     with open(REPORT_PATH, 'w', encoding='utf-8') as rf:
@@ -34,14 +34,23 @@ const COMMUNE_SPELLING_VARIANTS = {
 };
 
 const preferPatterns = [
+  'individual_parcels.normalized.source_commune.geojsons',
   'individual_parcels.normalized.source_commune.geojson',
+  'individual_parcels.source_commune.geojsons',
   'individual_parcels.source_commune.geojson',
+  'collective_parcels.normalized.source_commune.geojsons',
   'collective_parcels.normalized.source_commune.geojson',
+  'collective_parcels.source_commune.geojsons',
   'collective_parcels.source_commune.geojson',
+  'unjoined_parcels.normalized.source_commune.geojsons',
   'unjoined_parcels.normalized.source_commune.geojson',
+  'unjoined_parcels.source_commune.geojsons',
   'unjoined_parcels.source_commune.geojson',
+  'individual_parcels.normalized.geojsons',
   'individual_parcels.normalized.geojson',
+  'collective_parcels.normalized.geojsons',
   'collective_parcels.normalized.geojson',
+  'unjoined_parcels.normalized.geojsons',
   'unjoined_parcels.normalized.geojson',
   'individual_parcels.geojson',
   'collective_parcels.geojson',
@@ -57,6 +66,14 @@ function findParcelFiles() {
   return found;
 }
 
+// Python scripts write GeoJSON text sequences (RFC 8142): one RS-prefixed feature per record
+function parseGeoJSON(raw) {
+  if (raw.charCodeAt(0) !== 0x1e) return JSON.parse(raw);
+  const features = [];
+  for (const rec of raw.split('\x1e')) if (rec.trim()) features.push(JSON.parse(rec));
+  return { type: 'FeatureCollection', features };
+}
+
 function normalizeName(v) {
   if (!v) return null;
   const normalized = String(v).trim().toUpperCase();
@@ -116,7 +133,7 @@ function main() {
     const raw = fs.readFileSync(f, 'utf8');
     let gj;
     try { 
-      gj = JSON.parse(raw);
+      gj = parseGeoJSON(raw);
     } catch(e) { 
       console.error('Invalid JSON', f); 
       continue;